@@ -1,16 +1,26 @@
 # app.py
+import asyncio
+import hashlib
+import json
 import os
 import random
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
 
 import requests
 import pandas as pd
+import altair as alt
+import diskcache
+import orjson
 import streamlit as st
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # OpenAI (official SDK)
 # pip install openai
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 
 # =========================
@@ -60,14 +70,144 @@ STAT_LABELS_KO = {
     "speed": "스피드",
 }
 
+# 최소한의 감성 번역(필요하면 확장)
+TYPE_KO = {
+    "grass": "풀",
+    "fire": "불꽃",
+    "water": "물",
+    "bug": "벌레",
+    "normal": "노말",
+    "poison": "독",
+    "electric": "전기",
+    "ground": "땅",
+    "fairy": "페어리",
+    "fighting": "격투",
+    "psychic": "에스퍼",
+    "rock": "바위",
+    "ghost": "고스트",
+    "ice": "얼음",
+    "dragon": "드래곤",
+    "flying": "비행",
+    "steel": "강철",
+    "dark": "악",
+}
+
+
+@st.cache_resource(show_spinner=False)
+def _http_session() -> requests.Session:
+    """
+    모든 외부 HTTP 호출이 공유하는 세션 (커넥션/TLS 재사용)
+    rerun마다 스크립트가 다시 실행되므로 프로세스당 한 번만 만들어 재사용
+    """
+    session = requests.Session()
+    session.mount(
+        "https://",
+        HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            # 일시적인 5xx는 한 번만 빠르게 재시도 (GraphQL 조회 POST도 멱등이라 포함)
+            # 연결/읽기 타임아웃은 재시도하지 않음 - 최악의 대기 시간을 HTTP_TIMEOUT 한 번으로 묶기 위해
+            max_retries=Retry(
+                total=1,
+                connect=0,
+                read=0,
+                backoff_factor=0.1,
+                status_forcelist=[502, 503, 504],
+                allowed_methods=frozenset({"GET", "POST"}),
+            ),
+        ),
+    )
+    session.headers.update({"Accept-Encoding": "gzip"})
+    return session
+
+
+# (connect, read) - 느린 API가 UI를 오래 붙잡지 않도록
+HTTP_TIMEOUT = (2.0, 4.0)
 
-def safe_get(url: str, timeout: int = 10):
+
+@st.cache_resource(show_spinner=False)
+def _disk_cache():
+    """
+    디스크 캐시 (L2) - 프로세스 재시작/세션이 바뀌어도 API 재호출을 피함
+    프로세스당 한 번만 열고, 읽기 전용 배포 등에서 만들 수 없으면 None (L2 없이 동작)
+    """
     try:
-        return requests.get(url, timeout=timeout)
+        return diskcache.Cache(str(Path(__file__).with_name(".cache") / "poke"))
     except Exception:
         return None
 
 
+def _l2_get(key: str):
+    """디스크 캐시 조회 - 캐시가 없거나 오류면 None"""
+    cache = _disk_cache()
+    if cache is None:
+        return None
+    try:
+        return cache.get(key)
+    except Exception:
+        return None
+
+
+def _l2_set(key: str, value, expire: float | None = None):
+    """디스크 캐시 저장 - 실패해도 무시 (캐시는 부가 기능)"""
+    cache = _disk_cache()
+    if cache is None:
+        return
+    try:
+        cache.set(key, value, expire=expire)
+    except Exception:
+        pass
+
+
+# PokeAPI GraphQL - 필요한 필드만 받아서 응답 크기를 줄임
+POKEAPI_GRAPHQL_URL = "https://beta.pokeapi.co/graphql/v1beta"
+POKEMON_QUERY = """
+query($id: Int!) {
+  pokemon_v2_pokemon_by_pk(id: $id) {
+    name
+    id
+    pokemon_v2_pokemontypes(order_by: {slot: asc}) { pokemon_v2_type { name } }
+    pokemon_v2_pokemonstats { base_stat pokemon_v2_stat { name } }
+  }
+}
+"""
+POKEMON_ARTWORK_URL = (
+    "https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/other/official-artwork/{pid}.png"
+)
+
+# 1세대 도감 스냅샷 (scripts/bake_pokedex.py로 생성) - 있으면 네트워크 호출 생략
+POKEDEX_PATH = Path(__file__).with_name("pokedex_gen1.json")
+
+
+@st.cache_resource(show_spinner=False)
+def _load_pokedex() -> dict[int, dict]:
+    """
+    스냅샷을 프로세스당 한 번만 읽어서 {도감 번호: 포켓몬} 으로
+    파일이 없거나 깨졌으면 빈 dict
+    """
+    try:
+        return {int(k): v for k, v in json.loads(POKEDEX_PATH.read_text(encoding="utf-8")).items()}
+    except (OSError, ValueError):
+        return {}
+
+
+# 코치 지시문 - 모든 요청에서 바이트 단위로 동일하게 유지 (서버 프롬프트 캐시 재사용)
+# 스타일처럼 바뀌는 값은 여기 넣지 말고 input 쪽으로
+_STATIC_INSTRUCTIONS = """
+너는 'AI 습관 코치'다. 체크인/기분/날씨/포켓몬을 보고 행동을 유도하는 1일 리포트를 쓴다.
+입력의 [코치 스타일] 톤을 따른다.
+규칙: 한국어, 아래 섹션 순서대로, 각 항목 1줄, 군더더기 없이.
+
+1) 컨디션 등급: S/A/B/C/D - 한 줄 코멘트
+2) 습관 분석: 잘한 점 2 / 아쉬운 점 1 / 내일 1% 개선 액션 1
+3) 날씨 코멘트: 날씨/기온/체감/습도 중 2개 이상 엮은 조언
+4) 내일 미션: 3개 (체크박스 기반, 구체적으로)
+5) 오늘의 파트너 포켓몬: 이름(#도감번호) / 타입 / 스탯 2개 하이라이트 / 스탯 은유 응원 2문장
+
+등급(습관 수 + 기분): S 4~5+8~10 / A 3~4+7~10 / B 2~3+5~8 / C 1~2 또는 3~5 / D 0~1+1~3
+""".strip()
+
+
 @st.cache_data(show_spinner=False, ttl=60 * 10)
 def get_weather(city: str, api_key: str):
     """
@@ -78,6 +218,10 @@ def get_weather(city: str, api_key: str):
     """
     if not api_key:
         return None
+    # L2 키에도 API 키 지문을 넣어서, 다른 사용자의 키로 받은 결과를 돌려주지 않도록
+    l2_key = f"w:{hashlib.sha256(api_key.encode()).hexdigest()[:12]}:{city}"
+    if (hit := _l2_get(l2_key)) is not None:
+        return hit
     url = "https://api.openweathermap.org/data/2.5/weather"
     params = {
         "q": city,
@@ -86,11 +230,11 @@ def get_weather(city: str, api_key: str):
         "lang": "kr",
     }
     try:
-        r = requests.get(url, params=params, timeout=10)
+        r = _http_session().get(url, params=params, timeout=HTTP_TIMEOUT)
         if r.status_code != 200:
             return None
-        j = r.json()
-        return {
+        j = orjson.loads(r.content)
+        result = {
             "city": city,
             "temp_c": j.get("main", {}).get("temp"),
             "feels_like_c": j.get("main", {}).get("feels_like"),
@@ -99,90 +243,125 @@ def get_weather(city: str, api_key: str):
             "wind_mps": j.get("wind", {}).get("speed"),
             "icon": (j.get("weather", [{}])[0] or {}).get("icon"),
         }
+        _l2_set(l2_key, result, expire=60 * 10)
+        return result
     except Exception:
         return None
 
 
-@st.cache_data(show_spinner=False, ttl=60 * 60)
-def get_pokemon():
+@st.cache_data(show_spinner=False, ttl=None)
+def get_pokemon_by_id(pid: int):
     """
-    PokeAPI: 1세대(1~151) 랜덤 포켓몬
+    PokeAPI(GraphQL): 도감 번호로 포켓몬 조회 (스냅샷 우선, 없으면 네트워크)
     - 공식 아트워크 URL
     - 이름, 도감 번호, 타입, 스탯
+    실패 시 예외 (st.cache_data는 예외를 캐시하지 않으므로 다음 호출에서 재시도됨)
+    """
+    if (baked := _load_pokedex().get(pid)) is not None:
+        return baked
+    if (hit := _l2_get(f"p:{pid}")) is not None:
+        return hit
+
+    r = _http_session().post(
+        POKEAPI_GRAPHQL_URL,
+        json={"query": POKEMON_QUERY, "variables": {"id": pid}},
+        timeout=HTTP_TIMEOUT,
+    )
+    r.raise_for_status()
+    j = (orjson.loads(r.content).get("data") or {}).get("pokemon_v2_pokemon_by_pk")
+    if not j:
+        raise LookupError(f"pokemon #{pid} not found")
+
+    name = j.get("name")
+    dex = j.get("id")
+    types = [
+        t["pokemon_v2_type"]["name"]
+        for t in j.get("pokemon_v2_pokemontypes", [])
+        if t.get("pokemon_v2_type")
+    ]
+
+    # 화면에 쓰는 6개 스탯만 파싱 단계에서 바로 걸러냄
+    stats = {
+        s["pokemon_v2_stat"]["name"]: s["base_stat"]
+        for s in j.get("pokemon_v2_pokemonstats", ())
+        if (s.get("pokemon_v2_stat") or {}).get("name") in STAT_LABELS_KO
+        and isinstance(s.get("base_stat"), int)
+    }
+
+    # 아트워크는 도감 번호로 결정되는 고정 URL
+    artwork = POKEMON_ARTWORK_URL.format(pid=pid)
+
+    result = {
+        "name": name,
+        "dex": dex,
+        "types": types,
+        "stats": stats,
+        "artwork": artwork,
+    }
+    # 도감 데이터는 변하지 않으므로 만료 없음
+    _l2_set(f"p:{pid}", result)
+    return result
+
+
+def get_pokemon(pid: int):
+    """
+    1세대(1~151) 포켓몬
+    (도감 번호는 호출하는 쪽에서 세션 RNG로 고름 - 캐시는 도감 번호 단위)
     실패 시 None
     """
-    pid = random.randint(1, 151)
-    url = f"https://pokeapi.co/api/v2/pokemon/{pid}"
     try:
-        r = requests.get(url, timeout=10)
-        if r.status_code != 200:
-            return None
-        j = r.json()
-
-        name = j.get("name")
-        dex = j.get("id")
-        types = [t["type"]["name"] for t in j.get("types", []) if "type" in t]
-
-        stats = {}
-        for s in j.get("stats", []):
-            key = s.get("stat", {}).get("name")
-            val = s.get("base_stat")
-            if key and isinstance(val, int):
-                stats[key] = val
-
-        artwork = (
-            j.get("sprites", {})
-            .get("other", {})
-            .get("official-artwork", {})
-            .get("front_default")
-        )
-
-        return {
-            "name": name,
-            "dex": dex,
-            "types": types,
-            "stats": stats,
-            "artwork": artwork,
-        }
+        return get_pokemon_by_id(pid)
     except Exception:
         return None
 
 
-def _coach_system_prompt(style_label: str) -> str:
-    base = f"""
-너는 'AI 습관 코치'다. 사용자의 오늘 습관 체크인 + 기분 + 날씨 + 포켓몬 정보를 보고,
-행동을 유도하는 1일 리포트를 작성한다.
-
-코치 스타일: {style_label}
-스타일 가이드: {COACH_STYLES.get(style_label, "")}
-
-출력 규칙:
-- 반드시 아래 섹션을 순서대로 출력한다.
-- 한국어로 작성한다.
-- 군더더기 없이, 하지만 읽기 즐겁게.
-
-출력 형식(그대로 유지):
-1) 컨디션 등급: (S/A/B/C/D 중 하나) - 한 줄 코멘트
-2) 습관 분석:
-- 잘한 점 2개
-- 아쉬운 점 1개
-- 내일 1% 개선 액션 1개
-3) 날씨 코멘트: (날씨/기온/체감/습도 중 2개 이상을 엮어서 현실적인 조언)
-4) 내일 미션(체크박스 기반): 3개 (각각 1줄, 구체적으로)
-5) 오늘의 파트너 포켓몬:
-- 포켓몬: 이름(#도감번호)
-- 타입:
-- 스탯 하이라이트: (스탯 2개를 골라 숫자와 함께)
-- 응원 멘트: (스탯을 은유로 연결해서, 한 문단)
-
-등급 기준 힌트(너가 판단):
-- S: 5개 습관 중 4~5개 + 기분 8~10
-- A: 3~4개 + 기분 7~10
-- B: 2~3개 + 기분 5~8
-- C: 1~2개 또는 기분 3~5
-- D: 0~1개 + 기분 1~3
-""".strip()
-    return base
+def fetch_context(city: str, api_key: str, pid: int):
+    """
+    날씨 + 포켓몬을 동시에 조회 (서로 독립적인 I/O라 병렬로)
+    반환: (weather, pokemon) - 각각 실패 시 None
+    """
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        fw = ex.submit(get_weather, city, api_key)
+        fp = ex.submit(get_pokemon, pid)
+        return fw.result(), fp.result()
+
+
+async def _areport(openai_api_key: str, instructions: str, user_payload: str, on_delta=None) -> tuple[str, bool]:
+    """
+    AsyncOpenAI 스트리밍 호출 1회
+    반환: (텍스트, 출력 토큰 상한으로 잘렸는지)
+    (asyncio.run마다 이벤트 루프가 새로 생기므로 클라이언트도 호출 단위로 생성/정리)
+    """
+    async with AsyncOpenAI(api_key=openai_api_key) as client:
+        buf = ""
+        async with client.responses.stream(
+            model="gpt-5-mini",
+            instructions=instructions,
+            input=user_payload,
+            # 안전하게 텍스트 포맷 명시 (Responses API 레퍼런스 기준)
+            text={"format": {"type": "text"}},
+            # 5개 섹션(한국어)이 들어갈 만큼만 - 출력 토큰 수가 지연 시간을 좌우함
+            max_output_tokens=700,
+            # 추론 토큰도 상한에 포함되므로 최소로
+            reasoning={"effort": "minimal"},
+            extra_body={"prompt_cache_key": "coach-v1"},
+        ) as stream:
+            final = None
+            async for event in stream:
+                if event.type == "response.output_text.delta":
+                    buf += event.delta
+                    if on_delta:
+                        on_delta(buf)
+                elif event.type in ("response.completed", "response.incomplete"):
+                    # 상한에 걸리면 response.completed 없이 response.incomplete로 끝남
+                    final = event.response
+            if final is None:
+                raise RuntimeError("응답이 완료되지 않았습니다.")
+            if final.status == "completed":
+                final = await stream.get_final_response()
+        details = getattr(final, "incomplete_details", None)
+        truncated = final.status == "incomplete" and getattr(details, "reason", None) == "max_output_tokens"
+        return (final.output_text or buf).strip(), truncated
 
 
 def generate_report(
@@ -192,14 +371,17 @@ def generate_report(
     mood: int,
     weather: dict | None,
     pokemon: dict | None,
+    on_delta=None,
 ):
     """
-    OpenAI Responses API
+    OpenAI Responses API (스트리밍)
     모델: gpt-5-mini
-    실패 시 (None, error_message)
+    - on_delta(text): 토큰이 도착할 때마다 누적 텍스트로 호출
+    반환: (report, None, truncated) - truncated는 출력 길이 상한으로 잘린 경우 True
+    실패 시 (None, error_message, False)
     """
     if not openai_api_key:
-        return None, "OpenAI API Key가 필요합니다."
+        return None, "OpenAI API Key가 필요합니다.", False
 
     w = weather or {}
     p = pokemon or {}
@@ -222,6 +404,9 @@ def generate_report(
     )
 
     user_payload = f"""
+[코치 스타일]
+{coach_style}: {COACH_STYLES.get(coach_style, "")}
+
 [오늘 체크인]
 - 완료한 습관: {', '.join(habits_checked) if habits_checked else '없음'}
 - 기분(1~10): {mood}
@@ -237,17 +422,29 @@ def generate_report(
 """.strip()
 
     try:
-        client = OpenAI(api_key=openai_api_key)
-        resp = client.responses.create(
-            model="gpt-5-mini",
-            instructions=_coach_system_prompt(coach_style),
-            input=user_payload,
-            # 안전하게 텍스트 포맷 명시 (Responses API 레퍼런스 기준)
-            text={"format": {"type": "text"}},
+        # 독립적인 LLM 호출이 늘어나면 _areport와 나란히 asyncio.gather로 묶으면 됨
+        report, truncated = asyncio.run(
+            _areport(openai_api_key, _STATIC_INSTRUCTIONS, user_payload, on_delta)
         )
-        return (resp.output_text or "").strip(), None
+        return report, None, truncated
     except Exception as e:
-        return None, f"OpenAI 호출 실패: {e}"
+        return None, f"OpenAI 호출 실패: {e}", False
+
+
+@st.cache_data(show_spinner=False)
+def _historical_six(base_date):
+    """
+    데모용 샘플 6일 (base_date 전날까지)
+    """
+    idx = pd.date_range(end=pd.Timestamp(base_date) - pd.Timedelta(days=1), periods=6, freq="D", name="date")
+    return pd.DataFrame(
+        {
+            "achv_rate": [40, 60, 80, 20, 60, 40],
+            "checked": [2, 3, 4, 1, 3, 2],
+            "mood": [5, 6, 7, 4, 6, 5],
+        },
+        index=idx,
+    )
 
 
 def build_demo_week(today_rate: int, today_checked: int, today_mood: int):
@@ -255,48 +452,33 @@ def build_demo_week(today_rate: int, today_checked: int, today_mood: int):
     데모용 6일 + 오늘 1일 = 7일 데이터
     """
     base = datetime.now().date()
-    dates = [base - timedelta(days=d) for d in range(6, 0, -1)] + [base]
-
-    # 샘플(6일)
-    sample = [
-        {"date": dates[0], "achv_rate": 40, "checked": 2, "mood": 5},
-        {"date": dates[1], "achv_rate": 60, "checked": 3, "mood": 6},
-        {"date": dates[2], "achv_rate": 80, "checked": 4, "mood": 7},
-        {"date": dates[3], "achv_rate": 20, "checked": 1, "mood": 4},
-        {"date": dates[4], "achv_rate": 60, "checked": 3, "mood": 6},
-        {"date": dates[5], "achv_rate": 40, "checked": 2, "mood": 5},
-    ]
+    # 샘플(6일) - 캐시된 복사본이라 그대로 수정해도 안전
+    df = _historical_six(base)
     # 오늘
-    sample.append({"date": dates[6], "achv_rate": today_rate, "checked": today_checked, "mood": today_mood})
-    df = pd.DataFrame(sample)
-    df["date"] = pd.to_datetime(df["date"])
-    df = df.set_index("date")
+    df.loc[pd.Timestamp(base)] = [today_rate, today_checked, today_mood]
     return df
 
 
-def type_ko(t: str) -> str:
-    # 최소한의 감성 번역(필요하면 확장)
-    mapping = {
-        "grass": "풀",
-        "fire": "불꽃",
-        "water": "물",
-        "bug": "벌레",
-        "normal": "노말",
-        "poison": "독",
-        "electric": "전기",
-        "ground": "땅",
-        "fairy": "페어리",
-        "fighting": "격투",
-        "psychic": "에스퍼",
-        "rock": "바위",
-        "ghost": "고스트",
-        "ice": "얼음",
-        "dragon": "드래곤",
-        "flying": "비행",
-        "steel": "강철",
-        "dark": "악",
-    }
-    return mapping.get(t, t)
+@st.cache_data(show_spinner=False)
+def _week_spec(values: tuple, dates: tuple) -> dict:
+    """
+    최근 7일 달성률 막대 차트 Vega-Lite 스펙 (같은 값이면 캐시 재사용)
+    """
+    return (
+        alt.Chart(pd.DataFrame({"date": dates, "achv": values}))
+        .mark_bar()
+        .encode(
+            # "YYYY-MM-DD" 문자열은 UTC 자정으로 파싱되므로 UTC 기준으로 묶어야 날짜가 밀리지 않음
+            x=alt.X("date:T", timeUnit="utcmonthdate", title=""),
+            y=alt.Y("achv:Q", title="달성률(%)", scale=alt.Scale(domain=[0, 100])),
+            tooltip=[
+                alt.Tooltip("date:T", timeUnit="utcyearmonthdate", title="날짜"),
+                alt.Tooltip("achv:Q", title="달성률"),
+            ],
+        )
+        .properties(height=220)
+        .to_dict()
+    )
 
 
 # =========================
@@ -327,6 +509,13 @@ with st.sidebar:
     st.caption("-.env에서도 자동 로드됩니다 (OPENAI_API_KEY / OPENWEATHER_API_KEY).")
 
 
+# 세션별 RNG - 전역 random 상태를 공유하지 않고, 세션 안에서는 파트너 포켓몬을 고정
+if "rng" not in st.session_state:
+    st.session_state.rng = random.Random()
+if "pokemon_id" not in st.session_state:
+    st.session_state.pokemon_id = st.session_state.rng.randint(1, 151)
+
+
 # =========================
 # Main UI
 # =========================
@@ -334,51 +523,71 @@ st.title("🎮 AI 습관 트래커 (포켓몬)")
 st.write("오늘의 습관을 체크하고 - 날씨/포켓몬/AI 코치 리포트로 하루를 정리해보자.")
 
 
-st.subheader("✅ 습관 체크인")
+def _checkin_state():
+    """
+    체크인 위젯 값(session_state) -> (checked_habits, mood, city, coach_style)
+    """
+    checked_habits = [label for _, label in HABITS if st.session_state.get(f"habit_{label}", False)]
+    mood = st.session_state.get("mood", 6)
+    city = st.session_state.get("city", CITIES[0])
+    coach_style = st.session_state.get("coach_style", next(iter(COACH_STYLES)))
+    return checked_habits, mood, city, coach_style
 
-c1, c2 = st.columns(2)
-habit_state = {}
 
-# 2열 배치: 5개를 번갈아 배치
-for i, (emoji, label) in enumerate(HABITS):
-    target_col = c1 if i % 2 == 0 else c2
-    with target_col:
-        habit_state[label] = st.checkbox(f"{emoji} {label}", value=False)
+@st.fragment
+def _checkin_fragment():
+    """
+    체크인 입력 + 지표 + 주간 차트
+    위젯을 바꾸면 이 영역만 다시 실행됨 (리포트 영역은 버튼을 눌렀을 때만)
+    """
+    st.subheader("✅ 습관 체크인")
 
-mood = st.slider("🙂 기분(1~10)", min_value=1, max_value=10, value=6)
+    c1, c2 = st.columns(2)
 
-sel1, sel2 = st.columns([1, 1])
-with sel1:
-    city = st.selectbox("🏙️ 도시 선택", CITIES, index=0)
-with sel2:
-    coach_style = st.radio("🧭 코치 스타일", list(COACH_STYLES.keys()), horizontal=True)
+    # 2열 배치: 5개를 번갈아 배치
+    for i, (emoji, label) in enumerate(HABITS):
+        target_col = c1 if i % 2 == 0 else c2
+        with target_col:
+            st.checkbox(f"{emoji} {label}", value=False, key=f"habit_{label}")
 
-checked_habits = [k for k, v in habit_state.items() if v]
-checked_count = len(checked_habits)
-achv_rate = int(round((checked_count / len(HABITS)) * 100, 0))
+    st.slider("🙂 기분(1~10)", min_value=1, max_value=10, value=6, key="mood")
 
-st.divider()
+    sel1, sel2 = st.columns([1, 1])
+    with sel1:
+        st.selectbox("🏙️ 도시 선택", CITIES, index=0, key="city")
+    with sel2:
+        st.radio("🧭 코치 스타일", list(COACH_STYLES.keys()), horizontal=True, key="coach_style")
 
-# =========================
-# Metrics + Weekly Chart
-# =========================
-m1, m2, m3 = st.columns(3)
-m1.metric("달성률", f"{achv_rate}%")
-m2.metric("달성 습관", f"{checked_count}/{len(HABITS)}")
-m3.metric("기분", f"{mood}/10")
+    checked_habits, mood, _, _ = _checkin_state()
+    checked_count = len(checked_habits)
+    achv_rate = int(round((checked_count / len(HABITS)) * 100, 0))
 
-df_week = build_demo_week(achv_rate, checked_count, mood)
+    st.divider()
 
-st.subheader("📊 최근 7일 달성률")
-st.bar_chart(df_week[["achv_rate"]], height=220)
+    # =========================
+    # Metrics + Weekly Chart
+    # =========================
+    m1, m2, m3 = st.columns(3)
+    m1.metric("달성률", f"{achv_rate}%")
+    m2.metric("달성 습관", f"{checked_count}/{len(HABITS)}")
+    m3.metric("기분", f"{mood}/10")
 
-st.divider()
+    df_week = build_demo_week(achv_rate, checked_count, mood)
 
-# =========================
-# Fetch Weather & Pokemon (on-demand but cheap)
-# =========================
-weather = get_weather(city, st.session_state.get("weather_key", ""))
-pokemon = get_pokemon()
+    st.subheader("📊 최근 7일 달성률")
+    st.vega_lite_chart(
+        _week_spec(tuple(df_week["achv_rate"]), tuple(df_week.index.astype(str))),
+        use_container_width=True,
+    )
+
+    st.divider()
+
+
+_checkin_fragment()
+
+checked_habits, mood, city, coach_style = _checkin_state()
+checked_count = len(checked_habits)
+achv_rate = int(round((checked_count / len(HABITS)) * 100, 0))
 
 # =========================
 # Generate Report
@@ -388,85 +597,91 @@ st.subheader("🧠 AI 코치 리포트")
 btn = st.button("컨디션 리포트 생성", type="primary", use_container_width=True)
 
 if btn:
-    with st.spinner("리포트 생성 중..."):
-        report, err = generate_report(
-            openai_api_key=st.session_state.get("openai_key", ""),
-            coach_style=coach_style,
-            habits_checked=checked_habits,
-            mood=mood,
-            weather=weather,
-            pokemon=pokemon,
+    with st.spinner("날씨/포켓몬 불러오는 중..."):
+        # 날씨/포켓몬은 버튼을 눌렀을 때만 조회 (평소 rerun에는 네트워크 호출 없음)
+        weather, pokemon = fetch_context(
+            city, st.session_state.get("weather_key", ""), st.session_state["pokemon_id"]
         )
 
-    if err:
-        st.error(err)
-    else:
-        # 2열: 날씨 카드 + 포켓몬 카드
-        left, right = st.columns(2)
-
-        with left:
-            st.markdown("### ☁️ 오늘의 날씨")
-            if weather:
-                icon = weather.get("icon")
-                icon_url = f"https://openweathermap.org/img/wn/{icon}@2x.png" if icon else None
-                if icon_url:
-                    st.image(icon_url, width=72)
-                st.markdown(
-                    f"""
+    # 2열: 날씨 카드 + 포켓몬 카드
+    left, right = st.columns(2)
+
+    with left:
+        st.markdown("### ☁️ 오늘의 날씨")
+        if weather:
+            icon = weather.get("icon")
+            icon_url = f"https://openweathermap.org/img/wn/{icon}@2x.png" if icon else None
+            if icon_url:
+                st.image(icon_url, width=72)
+            st.markdown(
+                f"""
 - **도시**: {weather.get("city")}
 - **날씨**: {weather.get("desc")}
 - **기온**: {weather.get("temp_c")}°C (체감 {weather.get("feels_like_c")}°C)
 - **습도**: {weather.get("humidity")}%
 - **바람**: {weather.get("wind_mps")} m/s
 """.strip()
-                )
-            else:
-                st.info("날씨 정보를 가져오지 못했어요 - OpenWeatherMap API Key/도시를 확인해줘.")
-
-        with right:
-            st.markdown("### 🧩 오늘의 포켓몬")
-            if pokemon:
-                name = pokemon.get("name") or "unknown"
-                dex = pokemon.get("dex") or "?"
-                types = pokemon.get("types") or []
-                types_ko = [type_ko(t) for t in types]
-
-                st.markdown(f"**{name} (#{dex})**  -  타입: `{', '.join(types_ko) if types_ko else 'N/A'}`")
-
-                if pokemon.get("artwork"):
-                    st.image(pokemon["artwork"], use_container_width=True)
-
-                # 스탯 바 차트 (빨간색)
-                stats = pokemon.get("stats") or {}
-                stat_items = []
-                for k, v in stats.items():
-                    if k in STAT_LABELS_KO:
-                        stat_items.append({"stat": STAT_LABELS_KO[k], "value": v})
-
-                if stat_items:
-                    import altair as alt
-
-                    df_stats = pd.DataFrame(stat_items)
-                    chart = (
-                        alt.Chart(df_stats)
-                        .mark_bar(color="red")
-                        .encode(
-                            x=alt.X("value:Q", title="스탯"),
-                            y=alt.Y("stat:N", sort="-x", title=""),
-                            tooltip=["stat", "value"],
-                        )
-                        .properties(height=220)
+            )
+        else:
+            st.info("날씨 정보를 가져오지 못했어요 - OpenWeatherMap API Key/도시를 확인해줘.")
+
+    with right:
+        st.markdown("### 🧩 오늘의 포켓몬")
+        if pokemon:
+            name = pokemon.get("name") or "unknown"
+            dex = pokemon.get("dex") or "?"
+            types = pokemon.get("types") or []
+            types_ko = [TYPE_KO.get(t, t) for t in types]
+
+            st.markdown(f"**{name} (#{dex})**  -  타입: `{', '.join(types_ko) if types_ko else 'N/A'}`")
+
+            if pokemon.get("artwork"):
+                st.image(pokemon["artwork"], use_container_width=True)
+
+            # 스탯 바 차트 (빨간색)
+            stats = pokemon.get("stats") or {}
+            stat_items = [{"stat": STAT_LABELS_KO[k], "value": v} for k, v in stats.items()]
+
+            if stat_items:
+                df_stats = pd.DataFrame(stat_items)
+                chart = (
+                    alt.Chart(df_stats)
+                    .mark_bar(color="red")
+                    .encode(
+                        x=alt.X("value:Q", title="스탯"),
+                        y=alt.Y("stat:N", sort="-x", title=""),
+                        tooltip=["stat", "value"],
                     )
-                    st.altair_chart(chart, use_container_width=True)
-                else:
-                    st.caption("스탯 데이터가 비어있어요.")
+                    .properties(height=220)
+                )
+                st.altair_chart(chart, use_container_width=True)
             else:
-                st.info("포켓몬 정보를 가져오지 못했어요 - 네트워크 상태를 확인해줘.")
+                st.caption("스탯 데이터가 비어있어요.")
+        else:
+            st.info("포켓몬 정보를 가져오지 못했어요 - 네트워크 상태를 확인해줘.")
 
-        st.divider()
+    st.divider()
 
-        st.markdown("### 📝 AI 리포트")
-        st.write(report)
+    st.markdown("### 📝 AI 리포트")
+    # 최종 리포트가 놓일 자리에 토큰이 도착하는 대로 바로 보여주기
+    placeholder = st.empty()
+    with st.spinner("리포트 생성 중..."):
+        report, err, truncated = generate_report(
+            openai_api_key=st.session_state.get("openai_key", ""),
+            coach_style=coach_style,
+            habits_checked=checked_habits,
+            mood=mood,
+            weather=weather,
+            pokemon=pokemon,
+            on_delta=placeholder.markdown,
+        )
+
+    if err:
+        st.error(err)
+    else:
+        placeholder.markdown(report)
+        if truncated:
+            st.warning("리포트가 출력 길이 제한에 걸려 중간에 잘렸어요 - 다시 생성해줘.")
 
         # 공유용 텍스트
         share = f"""[AI 습관 트래커 - 오늘의 컨디션]
@@ -0,0 +1,49 @@
+# scripts/bake_pokedex.py
+"""
+1세대(1~151) 포켓몬을 PokeAPI에서 한 번 받아서 pokedex_gen1.json으로 저장
+- app.py의 get_pokemon_by_id 반환 형식과 동일
+사용법: python scripts/bake_pokedex.py
+"""
+import json
+from pathlib import Path
+
+import requests
+
+ARTWORK_URL = (
+    "https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/other/official-artwork/{pid}.png"
+)
+# app.py의 STAT_LABELS_KO 키와 동일 - 화면이 쓰는 6개 스탯만 저장
+STAT_KEYS = frozenset({"hp", "attack", "defense", "special-attack", "special-defense", "speed"})
+OUT_PATH = Path(__file__).resolve().parent.parent / "pokedex_gen1.json"
+
+
+def fetch(session: requests.Session, pid: int) -> dict:
+    r = session.get(f"https://pokeapi.co/api/v2/pokemon/{pid}", timeout=10)
+    r.raise_for_status()
+    j = r.json()
+    return {
+        "name": j.get("name"),
+        "dex": j.get("id"),
+        "types": [t["type"]["name"] for t in j.get("types", []) if "type" in t],
+        "stats": {
+            s["stat"]["name"]: s["base_stat"]
+            for s in j.get("stats", [])
+            if s.get("stat", {}).get("name") in STAT_KEYS and isinstance(s.get("base_stat"), int)
+        },
+        # 도감 번호로 결정되는 고정 URL (app.py와 동일)
+        "artwork": ARTWORK_URL.format(pid=pid),
+    }
+
+
+def main():
+    with requests.Session() as session:
+        dex = {}
+        for pid in range(1, 152):
+            dex[str(pid)] = fetch(session, pid)
+            print(f"#{pid} {dex[str(pid)]['name']}")
+    OUT_PATH.write_text(json.dumps(dex, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    print(f"saved: {OUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()